@@ -509,8 +509,8 @@ class P2PBenchmark:
             return None
 
     def _wait_for_rustpbx(self, timeout: int = 30) -> bool:
-        start_time = time.time()
-        while time.time() - start_time < timeout:
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
             try:
                 if self.rustpbx_process and self.rustpbx_process.poll() is not None:
                     return False
@@ -630,9 +630,9 @@ class P2PBenchmark:
 
         # Wait for completion with generous timeout
         timeout = max(120, total // max(cps, 1) + duration + 60)
-        t_start = time.time()
+        t_start = time.monotonic()
         self.uac_process.wait(timeout=timeout)
-        wall_time = time.time() - t_start
+        wall_time = time.monotonic() - t_start
 
         output = self.uac_process.output()
         return output, wall_time
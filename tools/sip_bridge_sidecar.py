@@ -10,13 +10,15 @@ Python SDK has proven reliable on the same machine/minute where the Rust SDK
 fails `wait_pc_connection`.
 
 Wire protocol (both directions), matching rustpbx's external_media::media:
-  * raw 16-bit little-endian PCM, 48 kHz, mono, 20 ms frames = 1920 bytes.
+  * raw 16-bit little-endian PCM, mono, 20 ms frames. 48 kHz (1920-byte
+    frames) unless the trunk's pcm_sample_rate makes rustpbx pass
+    --sample-rate=16000|24000 (640 / 960-byte frames).
   * control datagrams: b"READY" (sidecar→rustpbx, once, on join) and
     b"BYE" (either direction, to end the call).
 
 Lifecycle:
   1. rustpbx spawns:  <command> --call-id <id> --did <to> --caller <from>
-                      --port <Q>
+                      --port <Q> [--sample-rate <hz>]
   2. Sidecar binds an ephemeral 127.0.0.1 UDP socket, sends b"READY" to
      127.0.0.1:Q. rustpbx learns our address from that datagram and
      `connect()`s its socket to us, then answers the SIP INVITE.
@@ -34,16 +36,21 @@ Usage (normally invoked by rustpbx, but runnable by hand for testing):
 
 import argparse
 import asyncio
+import collections
 import json
 import logging
 import os
 import re
 import signal
 
-import numpy as np
 from dotenv import find_dotenv, load_dotenv
 from livekit import api, rtc
 
+try:  # optional: libuv-based event loop, used automatically when installed
+    import uvloop
+except ImportError:
+    uvloop = None
+
 # Load LiveKit creds (LIVEKIT_URL / LIVEKIT_API_KEY / LIVEKIT_API_SECRET /
 # AGENT_NAME). Search order, first hit wins:
 #   1. $SIP_SIDECAR_ENV (explicit override),
@@ -59,19 +66,41 @@ for _cand in (os.getenv("SIP_SIDECAR_ENV"),
         break
 if not _loaded:
     load_dotenv(find_dotenv(usecwd=True))
-logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+# Every per-call sidecar inherits rustpbx's stderr; SIP_SIDECAR_LOG_LEVEL=WARNING
+# trims that to problems only on busy trunks. An unknown name must not kill
+# the sidecar before READY (every call on the host would fail), so it falls
+# back to INFO with a warning.
+_log_level_name = os.getenv("SIP_SIDECAR_LOG_LEVEL", "INFO").upper()
+_log_level = logging.getLevelName(_log_level_name)   # int for known names
+logging.basicConfig(level=_log_level if isinstance(_log_level, int) else logging.INFO,
+                    format="%(levelname)s %(message)s")
 log = logging.getLogger("sip-sidecar")
+if not isinstance(_log_level, int):
+    log.warning("unknown SIP_SIDECAR_LOG_LEVEL %r; using INFO", _log_level_name)
 
-SR = 48000               # LiveKit native sample rate (== rustpbx wire rate)
+SR = 48000               # default wire rate (LiveKit native); see --sample-rate
+SAMPLE_RATES = (16000, 24000, 48000)       # rustpbx's allowed pcm_sample_rate
 CH = 1
 FRAME_MS = 20            # rustpbx sends/expects 20 ms frames
-FRAME_SAMPLES = SR * FRAME_MS // 1000      # 960
-FRAME_BYTES = FRAME_SAMPLES * 2            # 1920
+
+# Caller audio backlog held between the UDP socket and LiveKit (1 s). The
+# ring only fills once capture_frame blocks, which happens after the
+# AudioSource's own queue (SDK default, also 1 s) is full; beyond both the
+# oldest frame is dropped. A stalled publisher therefore adds at most ~2 s of
+# latency rather than growing without limit.
+CALLER_QUEUE_MS = 1000
+CALLER_QUEUE_FRAMES = CALLER_QUEUE_MS // FRAME_MS
 
 READY = b"READY"
 BYE = b"BYE"
 
 
+def frame_samples_for(sample_rate: int) -> int:
+    """Samples per channel in one 20 ms frame (960 at 48 kHz). Frames are
+    16-bit mono, so the datagram size is twice this."""
+    return sample_rate * FRAME_MS // 1000
+
+
 def room_name_for(call_id: str, did: str) -> str:
     """Derive a per-call room name. call_id is unique per call; sanitise it
     to the charset LiveKit room names allow."""
@@ -108,86 +137,147 @@ def build_sip_attributes(call_id: str, did: str, caller: str) -> dict[str, str]:
     return attrs
 
 
+class PcmRing:
+    """Bounded FIFO of caller PCM frames between the datagram callback and the
+    single publisher task. A full ring evicts its oldest frame on append
+    (deque maxlen), which is the drop-oldest policy without asyncio.Queue's
+    QueueFull → get → put round trip on every overflowing datagram."""
+
+    __slots__ = ("_frames", "_waiter")
+
+    def __init__(self, maxlen: int):
+        self._frames: collections.deque[bytes] = collections.deque(maxlen=maxlen)
+        self._waiter: asyncio.Future | None = None
+
+    def put(self, data: bytes) -> None:
+        self._frames.append(data)
+        waiter = self._waiter
+        if waiter is not None and not waiter.done():
+            waiter.set_result(None)
+
+    async def get(self) -> bytes:
+        while not self._frames:
+            self._waiter = asyncio.get_running_loop().create_future()
+            try:
+                await self._waiter
+            finally:
+                self._waiter = None
+        return self._frames.popleft()
+
+
 class PcmBridgeProtocol(asyncio.DatagramProtocol):
     """Receives caller PCM (rustpbx→sidecar) and feeds it to the LiveKit
     publisher source in order. Also the send path for agent PCM."""
 
-    def __init__(self, source: rtc.AudioSource, queue: asyncio.Queue, stop: asyncio.Event):
+    # Touched on every datagram; slots keep attribute access off a dict.
+    __slots__ = ("source", "ring", "stop", "frame_bytes", "transport")
+
+    def __init__(self, source: rtc.AudioSource, ring: PcmRing, stop: asyncio.Event,
+                 frame_bytes: int):
         self.source = source
-        self.queue = queue
+        self.ring = ring
         self.stop = stop
+        self.frame_bytes = frame_bytes
         self.transport: asyncio.DatagramTransport | None = None
 
     def connection_made(self, transport: asyncio.DatagramTransport) -> None:
         self.transport = transport
 
     def datagram_received(self, data: bytes, addr) -> None:
-        if data == BYE:
+        # Classify by length: PCM frames are the steady-state case and are
+        # never BYE-sized, so test for them first.
+        if len(data) == self.frame_bytes:
+            # Hand off to the ordered consumer; never await here. A full
+            # ring drops its oldest frame to bound latency under backpressure.
+            self.ring.put(data)
+        elif data == BYE:
             log.info("rustpbx sent BYE — ending call")
             self.stop.set()
-            return
-        if len(data) == FRAME_BYTES:
-            # Hand off to the ordered consumer; never await here.
-            try:
-                self.queue.put_nowait(data)
-            except asyncio.QueueFull:
-                # Drop oldest to bound latency under backpressure.
-                try:
-                    self.queue.get_nowait()
-                    self.queue.put_nowait(data)
-                except asyncio.QueueEmpty:
-                    pass
 
     def error_received(self, exc) -> None:
         log.warning("PCM socket error: %s", exc)
 
 
-async def feed_caller_audio(source: rtc.AudioSource, queue: asyncio.Queue,
-                            stop: asyncio.Event) -> None:
-    """Single ordered consumer: caller PCM datagrams → LiveKit capture_frame."""
+async def feed_caller_audio(source: rtc.AudioSource, ring: PcmRing,
+                            stop: asyncio.Event, sample_rate: int) -> None:
+    """Single ordered consumer: caller PCM datagrams → LiveKit capture_frame.
+
+    Blocks on the ring with no timeout; teardown cancels this task, so there
+    is no need to wake up periodically just to re-check `stop`.
+
+    capture_frame has copied the samples out by the time it returns, so one
+    AudioFrame is allocated up front and refilled in place per datagram."""
+    frame = rtc.AudioFrame.create(sample_rate, CH, frame_samples_for(sample_rate))
+    pcm = frame.data.cast("B")
+    get, capture = ring.get, source.capture_frame
     while not stop.is_set():
-        try:
-            data = await asyncio.wait_for(queue.get(), timeout=0.5)
-        except asyncio.TimeoutError:
-            continue
-        frame = rtc.AudioFrame(
-            data=data,
-            sample_rate=SR,
-            num_channels=CH,
-            samples_per_channel=FRAME_SAMPLES,
-        )
-        await source.capture_frame(frame)
+        pcm[:] = await get()
+        await capture(frame)
 
 
 async def forward_agent_audio(track: rtc.RemoteAudioTrack, transport: asyncio.DatagramTransport,
-                              dst, stop: asyncio.Event, ready: asyncio.Event) -> None:
-    """Agent audio track → reframe to 20 ms (1920 B) → rustpbx over UDP.
+                              dst, stop: asyncio.Event, ready: asyncio.Event,
+                              sample_rate: int) -> None:
+    """Agent audio track → reframe to 20 ms → rustpbx over UDP.
 
-    AudioStream is constructed at 48 kHz mono so frames arrive already
-    resampled/downmixed; we only need to re-chunk to exactly 1920 bytes.
+    AudioStream is constructed at the wire rate, mono, so frames arrive
+    already resampled/downmixed; we only need to re-chunk to exactly one
+    20 ms frame (1920 bytes at 48 kHz).
 
     Waits for `ready` (set once READY has been sent to rustpbx) before
     forwarding, so rustpbx's first received datagram is always READY — not
     a stray PCM frame from a track that subscribed during room.connect()."""
     await ready.wait()
-    stream = rtc.AudioStream(track, sample_rate=SR, num_channels=CH)
+    stream = rtc.AudioStream(track, sample_rate=sample_rate, num_channels=CH)
+    frame_bytes = frame_samples_for(sample_rate) * 2
     buf = bytearray()
-    sent = 0
-    async for ev in stream:
-        if stop.is_set():
-            break
-        buf.extend(ev.frame.data)
-        while len(buf) >= FRAME_BYTES:
-            chunk = bytes(buf[:FRAME_BYTES])
-            del buf[:FRAME_BYTES]
-            transport.sendto(chunk, dst)
-            sent += 1
-            if sent == 1:
+    sendto = transport.sendto
+    announced = False
+    try:
+        async for ev in stream:
+            if stop.is_set():
+                break
+            buf.extend(ev.frame.data)
+            # Emit every whole frame, then drop the consumed prefix in one go
+            # rather than shifting the remainder once per frame. Slicing through
+            # a memoryview copies each frame exactly once, into the bytes handed
+            # to the transport; the view is released before buf is resized.
+            whole = len(buf) - len(buf) % frame_bytes
+            if not whole:
+                continue
+            with memoryview(buf) as view:
+                for off in range(0, whole, frame_bytes):
+                    sendto(bytes(view[off:off + frame_bytes]), dst)
+            del buf[:whole]
+            if not announced:
+                announced = True
                 log.info("first agent→rustpbx frame sent")
-    await stream.aclose()
+    finally:
+        await stream.aclose()
 
 
-async def main(call_id: str, did: str, caller: str, port: int) -> None:
+async def join_with_dispatch(room: rtc.Room, url: str, token: str, dispatch) -> None:
+    """Join `room` while `dispatch` (the agent-dispatch coroutine) runs
+    alongside it. Both must succeed: if the join fails the in-flight dispatch
+    is cancelled, and if the dispatch fails after the join went through the
+    room is left again before re-raising, so no caller participant is
+    stranded in it."""
+    task = asyncio.ensure_future(dispatch)
+    try:
+        await room.connect(url, token)
+    except BaseException:
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        raise
+    try:
+        await task
+    except BaseException:
+        await room.disconnect()
+        raise
+
+
+async def main(call_id: str, did: str, caller: str, port: int,
+               sample_rate: int = SR) -> None:
     url = os.environ["LIVEKIT_URL"]
     key = os.environ["LIVEKIT_API_KEY"]
     secret = os.environ["LIVEKIT_API_SECRET"]
@@ -195,6 +285,17 @@ async def main(call_id: str, did: str, caller: str, port: int) -> None:
     room_name = room_name_for(call_id, did)
 
     loop = asyncio.get_running_loop()
+    # Background tasks (feeder, forwarders, join watchdog). The loop only
+    # keeps weak references to tasks, so hold them here until they finish,
+    # and cancel whatever is left at teardown.
+    tasks: set[asyncio.Task] = set()
+
+    def spawn(coro) -> asyncio.Task:
+        task = asyncio.create_task(coro)
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+        return task
+
     stop = asyncio.Event()
     ready = asyncio.Event()   # set once READY is sent; gates agent forwarding
 
@@ -210,20 +311,26 @@ async def main(call_id: str, did: str, caller: str, port: int) -> None:
     #        the LiveKit room is joined + caller track published, so rustpbx
     #        never answers the SIP call into a dead bridge). ---
     rustpbx_addr = ("127.0.0.1", port)
-    source = rtc.AudioSource(SR, CH)
-    queue: asyncio.Queue = asyncio.Queue(maxsize=50)
+    source = rtc.AudioSource(sample_rate, CH)
+    ring = PcmRing(CALLER_QUEUE_FRAMES)
+    frame_bytes = frame_samples_for(sample_rate) * 2
     transport, protocol = await loop.create_datagram_endpoint(
-        lambda: PcmBridgeProtocol(source, queue, stop),
+        lambda: PcmBridgeProtocol(source, ring, stop, frame_bytes),
         local_addr=("127.0.0.1", 0),
     )
-    log.info("sidecar bound %s → rustpbx %s (call_id=%s did=%s caller=%s room=%s)",
-             transport.get_extra_info("sockname"), rustpbx_addr, call_id, did, caller, room_name)
-
-    # --- 2. dispatch the agent into the room ---
-    async with api.LiveKitAPI(url=url, api_key=key, api_secret=secret) as lk:
-        d = await lk.agent_dispatch.create_dispatch(
-            api.CreateAgentDispatchRequest(agent_name=agent_name, room=room_name)
-        )
+    log.info("sidecar bound %s → rustpbx %s (call_id=%s did=%s caller=%s room=%s rate=%d)",
+             transport.get_extra_info("sockname"), rustpbx_addr, call_id, did, caller, room_name,
+             sample_rate)
+
+    # --- 2. dispatch the agent into the room. Runs concurrently with the
+    #        room join below: the two are independent server round trips,
+    #        and both sit on the path to READY (the caller hears ringing
+    #        until then). ---
+    async def _dispatch_agent() -> None:
+        async with api.LiveKitAPI(url=url, api_key=key, api_secret=secret) as lk:
+            d = await lk.agent_dispatch.create_dispatch(
+                api.CreateAgentDispatchRequest(agent_name=agent_name, room=room_name)
+            )
         log.info("dispatched agent '%s' → room '%s' (id=%s)", agent_name, room_name, d.id)
 
     # --- 3. join the room as the caller participant ---
@@ -272,21 +379,21 @@ async def main(call_id: str, did: str, caller: str, port: int) -> None:
         agent_joined.set()
         log.info("subscribed to agent audio from %s (track='%s') — forwarding to rustpbx",
                  participant.identity, name)
-        asyncio.create_task(forward_agent_audio(track, transport, rustpbx_addr, stop, ready))
+        spawn(forward_agent_audio(track, transport, rustpbx_addr, stop, ready, sample_rate))
 
     @room.on("disconnected")
     def _disc(reason=None):
         log.info("room disconnected (reason=%s)", reason)
         stop.set()
 
-    await room.connect(url, token)
+    await join_with_dispatch(room, url, token, _dispatch_agent())
     log.info("connected to room; remote participants=%d", len(room.remote_participants))
 
     # --- 4. publish caller audio (fed from rustpbx PCM) ---
     track = rtc.LocalAudioTrack.create_audio_track("sip-caller-audio", source)
     await room.local_participant.publish_track(
         track, rtc.TrackPublishOptions(source=rtc.TrackSource.SOURCE_MICROPHONE))
-    feeder = asyncio.create_task(feed_caller_audio(source, queue, stop))
+    spawn(feed_caller_audio(source, ring, stop, sample_rate))
     log.info("publishing caller audio; bridge live")
 
     # Bridge is fully up (room joined + caller track published). Signal
@@ -308,12 +415,15 @@ async def main(call_id: str, did: str, caller: str, port: int) -> None:
                         agent_name, room_name, agent_join_timeout)
             stop.set()
 
-    asyncio.create_task(_watch_agent_join())
+    spawn(_watch_agent_join())
 
     # --- 5. run until stop, then tear down ---
     await stop.wait()
     log.info("tearing down sidecar")
-    feeder.cancel()
+    # Stop the audio tasks first so no PCM datagram can follow our BYE.
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
     transport.sendto(BYE, rustpbx_addr)   # best-effort notify rustpbx
     try:
         await room.disconnect()
@@ -328,5 +438,9 @@ if __name__ == "__main__":
     ap.add_argument("--did", required=True)
     ap.add_argument("--caller", required=True)
     ap.add_argument("--port", type=int, required=True)
+    # Only passed by rustpbx when the trunk overrides the 48 kHz default.
+    ap.add_argument("--sample-rate", dest="sample_rate", type=int, default=SR,
+                    choices=SAMPLE_RATES)
     args = ap.parse_args()
-    asyncio.run(main(args.call_id, args.did, args.caller, args.port))
+    run = uvloop.run if uvloop is not None else asyncio.run
+    run(main(args.call_id, args.did, args.caller, args.port, args.sample_rate))
@@ -0,0 +1,199 @@
+"""Unit tests for tools/sip_bridge_sidecar.py.
+
+Needs the sidecar's dependencies (pip install -r tools/requirements.txt).
+Run: python3 -m unittest tools.test_sip_bridge_sidecar -v
+or:  python3 tools/test_sip_bridge_sidecar.py
+"""
+import asyncio
+import os
+import sys
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+
+import sip_bridge_sidecar  # noqa: E402
+from sip_bridge_sidecar import (  # noqa: E402
+    BYE, PcmBridgeProtocol, PcmRing, forward_agent_audio, frame_samples_for,
+    join_with_dispatch,
+)
+
+NON_DEFAULT_RATES = (16000, 24000)
+
+
+class PcmRingTest(unittest.IsolatedAsyncioTestCase):
+    async def test_put_past_maxlen_evicts_oldest(self):
+        ring = PcmRing(2)
+        for frame in (b"a", b"b", b"c"):
+            ring.put(frame)
+        self.assertEqual(await ring.get(), b"b")
+        self.assertEqual(await ring.get(), b"c")
+
+    async def test_blocked_get_wakes_on_put(self):
+        ring = PcmRing(4)
+        getter = asyncio.create_task(ring.get())
+        await asyncio.sleep(0)
+        self.assertFalse(getter.done())
+        ring.put(b"frame")
+        self.assertEqual(await asyncio.wait_for(getter, timeout=1), b"frame")
+
+    async def test_cancelled_get_clears_waiter(self):
+        ring = PcmRing(4)
+        getter = asyncio.create_task(ring.get())
+        await asyncio.sleep(0)
+        self.assertIsNotNone(ring._waiter)
+        getter.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await getter
+        self.assertIsNone(ring._waiter)
+        # The ring stays usable for the next consumer.
+        ring.put(b"next")
+        self.assertEqual(await ring.get(), b"next")
+
+
+class FrameSizeTest(unittest.TestCase):
+    def test_frame_samples_per_rate(self):
+        self.assertEqual(frame_samples_for(16000), 320)
+        self.assertEqual(frame_samples_for(24000), 480)
+        self.assertEqual(frame_samples_for(48000), 960)
+
+
+class DatagramReceivedTest(unittest.IsolatedAsyncioTestCase):
+    def make_protocol(self, sample_rate: int):
+        ring = PcmRing(8)
+        stop = asyncio.Event()
+        proto = PcmBridgeProtocol(None, ring, stop, frame_samples_for(sample_rate) * 2)
+        return proto, ring, stop
+
+    async def test_frame_of_configured_size_reaches_ring(self):
+        for rate in NON_DEFAULT_RATES:
+            with self.subTest(rate=rate):
+                proto, ring, _ = self.make_protocol(rate)
+                frame = bytes(frame_samples_for(rate) * 2)   # 640 / 960
+                proto.datagram_received(frame, None)
+                self.assertEqual(await ring.get(), frame)
+
+    async def test_48k_sized_frame_is_dropped(self):
+        for rate in NON_DEFAULT_RATES:
+            with self.subTest(rate=rate):
+                proto, ring, stop = self.make_protocol(rate)
+                proto.datagram_received(bytes(1920), None)
+                self.assertEqual(len(ring._frames), 0)
+                self.assertFalse(stop.is_set())
+
+    async def test_bye_sets_stop(self):
+        for rate in NON_DEFAULT_RATES:
+            with self.subTest(rate=rate):
+                proto, ring, stop = self.make_protocol(rate)
+                proto.datagram_received(BYE, None)
+                self.assertTrue(stop.is_set())
+                self.assertEqual(len(ring._frames), 0)
+
+
+class FakeAudioStream:
+    """Stands in for rtc.AudioStream: yields the given chunks as frame events."""
+
+    def __init__(self, chunks):
+        self._chunks = chunks
+        self.closed = False
+
+    def __aiter__(self):
+        return self._iter()
+
+    async def _iter(self):
+        for chunk in self._chunks:
+            yield SimpleNamespace(frame=SimpleNamespace(data=chunk))
+
+    async def aclose(self):
+        self.closed = True
+
+
+class ForwardAgentAudioTest(unittest.IsolatedAsyncioTestCase):
+    async def test_emits_exact_frames_and_carries_remainder(self):
+        for rate in NON_DEFAULT_RATES:
+            with self.subTest(rate=rate):
+                frame_bytes = frame_samples_for(rate) * 2
+                pcm = bytes(i % 251 for i in range(frame_bytes * 3 + 100))
+                # Uneven event sizes so frames straddle event boundaries.
+                step = frame_bytes * 2 // 3
+                chunks = [pcm[i:i + step] for i in range(0, len(pcm), step)]
+                stream = FakeAudioStream(chunks)
+                transport = mock.Mock()
+                ready = asyncio.Event()
+                ready.set()
+                with mock.patch.object(sip_bridge_sidecar.rtc, "AudioStream",
+                                       lambda *a, **kw: stream):
+                    await forward_agent_audio(None, transport, ("127.0.0.1", 1),
+                                              asyncio.Event(), ready, rate)
+                sent = [c.args[0] for c in transport.sendto.call_args_list]
+                # The 100-byte tail never completes a frame, so it is held back.
+                self.assertEqual(len(sent), 3)
+                self.assertTrue(all(len(f) == frame_bytes for f in sent))
+                self.assertEqual(b"".join(sent), pcm[:frame_bytes * 3])
+                self.assertTrue(stream.closed)
+
+
+
+class FakeRoom:
+    def __init__(self, connect_error=None):
+        self.connect_error = connect_error
+        self.connected = False
+        self.disconnects = 0
+
+    async def connect(self, url, token):
+        await asyncio.sleep(0)
+        if self.connect_error:
+            raise self.connect_error
+        self.connected = True
+
+    async def disconnect(self):
+        self.disconnects += 1
+        self.connected = False
+
+
+class JoinWithDispatchTest(unittest.IsolatedAsyncioTestCase):
+    async def test_both_succeed(self):
+        room = FakeRoom()
+        dispatched = []
+
+        async def dispatch():
+            dispatched.append(True)
+
+        await join_with_dispatch(room, "wss://lk", "tok", dispatch())
+        self.assertTrue(room.connected)
+        self.assertEqual(dispatched, [True])
+        self.assertEqual(room.disconnects, 0)
+
+    async def test_failed_dispatch_after_join_leaves_room(self):
+        room = FakeRoom()
+
+        async def dispatch():
+            await asyncio.sleep(0.01)   # finishes after the join
+            raise RuntimeError("dispatch failed")
+
+        with self.assertRaisesRegex(RuntimeError, "dispatch failed"):
+            await join_with_dispatch(room, "wss://lk", "tok", dispatch())
+        self.assertFalse(room.connected)
+        self.assertEqual(room.disconnects, 1)
+
+    async def test_failed_join_cancels_dispatch(self):
+        room = FakeRoom(connect_error=ConnectionError("join failed"))
+        cancelled = asyncio.Event()
+
+        async def dispatch():
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        with self.assertRaisesRegex(ConnectionError, "join failed"):
+            await join_with_dispatch(room, "wss://lk", "tok", dispatch())
+        self.assertTrue(cancelled.is_set())
+        self.assertEqual(room.disconnects, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()